@@ -0,0 +1,72 @@
+"""
+Shared helpers for email attachments
+"""
+import os
+import base64
+import functools
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# _email_assets.py is at:
+# apps/welcome/backend/api/_email_assets.py
+# logo is at:
+# apps/welcome/frontend/public/assets/ArcTecFox-logo.jpg
+LOGO_PATH = os.path.abspath(
+    os.path.join(
+        os.path.dirname(__file__),
+        "..",        # -> backend
+        "..",        # -> welcome
+        "frontend",
+        "public",
+        "assets",
+        "ArcTecFox-logo.jpg",
+    )
+)
+
+
+def b64_file(path: str, chunk_size: int = 57 * 1024) -> str:
+    """
+    Base64-encode a file in fixed-size chunks so the raw file is never held in
+    memory alongside its encoding. chunk_size must be a multiple of 3 so the
+    encoded chunks concatenate without padding in between.
+    """
+    encoded = bytearray()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            encoded.extend(base64.b64encode(chunk))
+    return encoded.decode("ascii")
+
+
+@functools.lru_cache(maxsize=1)
+def load_logo_base64() -> Optional[str]:
+    """
+    Base64-encoded ArcTecFox logo for the inline CID attachment, or None if the
+    file cannot be read. Loaded once per process and shared by every sender.
+    """
+    try:
+        with open(LOGO_PATH, "rb") as f:
+            return base64.b64encode(f.read()).decode("ascii")
+    except FileNotFoundError:
+        logger.warning(f"Logo file not found at {LOGO_PATH}; emails will be sent without inline logo.")
+    except Exception as e:
+        logger.error(f"Error loading logo for email: {e}")
+    return None
+
+
+@functools.lru_cache(maxsize=1)
+def logo_attachment() -> Optional[dict]:
+    """
+    Resend inline (CID) attachment for the logo, built once and shared by every
+    send - treat it as read-only. None if the logo could not be loaded.
+    """
+    logo_b64 = load_logo_base64()
+    if not logo_b64:
+        return None
+    return {
+        "filename": "ArcTecFox-logo.jpg",
+        "content": logo_b64,
+        "content_id": "arcfox-logo",   # must match src="cid:arcfox-logo" in the templates
+        "content_type": "image/jpeg",
+    }
@@ -0,0 +1,99 @@
+"""
+Direct Resend HTTP API calls over the shared pooled client.
+
+Payloads are serialized with orjson instead of the SDK's stdlib json - email
+bodies can carry a multi-MB base64 PDF, where the encoder cost dominates.
+"""
+import os
+import uuid
+import random
+import asyncio
+import logging
+
+import httpx
+import orjson
+from http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+# Read once at import; callers simulate their sends when this is unset
+RESEND_API_KEY = os.getenv("RESEND_API_KEY")
+_RESEND_EMAILS_URL = "https://api.resend.com/emails"
+_RESEND_BATCH_URL = "https://api.resend.com/emails/batch"
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Client errors from Resend (4xx other than 429) will fail the same way on every
+    attempt; everything else (5xx, rate limiting, network errors) is worth retrying.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        status_code = error.response.status_code
+        return status_code == 429 or status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+async def _post(url: str, payload, idempotency_key: str = None) -> dict:
+    headers = {
+        "Authorization": f"Bearer {RESEND_API_KEY}",
+        "Content-Type": "application/json",
+    }
+    if idempotency_key:
+        headers["Idempotency-Key"] = idempotency_key
+    response = await get_http_client().post(
+        url,
+        content=orjson.dumps(payload),
+        headers=headers,
+        timeout=30,
+    )
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+
+async def post_email(params: dict, idempotency_key: str = None) -> dict:
+    """
+    POST one email to the Resend API and return the parsed response body.
+    Raises httpx.HTTPStatusError on a non-2xx response.
+    """
+    return await _post(_RESEND_EMAILS_URL, params, idempotency_key)
+
+
+async def post_batch(batch: list, idempotency_key: str = None) -> dict:
+    """
+    POST up to 100 emails (no attachments) to Resend's batch endpoint.
+    Raises httpx.HTTPStatusError on a non-2xx response.
+    """
+    return await _post(_RESEND_BATCH_URL, batch, idempotency_key)
+
+
+async def _with_retry(post, payload, max_retries: int, base_delay: float, cap: float) -> dict:
+    # One key for every attempt, so a retry after a timeout on a request Resend
+    # already accepted does not deliver the email(s) twice
+    idempotency_key = str(uuid.uuid4())
+    attempt = 0
+    while True:
+        try:
+            return await post(payload, idempotency_key)
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = random.uniform(0, min(cap, base_delay * 2 ** attempt))
+            attempt += 1
+            logger.warning(f"⚠️ Resend send failed ({e}); retry {attempt}/{max_retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+async def send_with_retry(params: dict, max_retries: int = 3, base_delay: float = 1.0, cap: float = 30.0) -> dict:
+    """
+    Send an email via Resend, retrying transient failures with exponential
+    backoff and full jitter. Re-raises the last error once retries are exhausted.
+    """
+    return await _with_retry(post_email, params, max_retries, base_delay, cap)
+
+
+async def send_batch_with_retry(batch: list, max_retries: int = 3, base_delay: float = 1.0, cap: float = 30.0) -> dict:
+    """
+    Send a batch via Resend's batch endpoint with the same retry policy as
+    send_with_retry.
+    """
+    return await _with_retry(post_batch, batch, max_retries, base_delay, cap)
@@ -2,9 +2,11 @@
 Access Request API endpoints for email authentication workflow
 """
 import os
+import asyncio
 import logging
-from datetime import datetime
-from fastapi import APIRouter, HTTPException, Depends
+from html import escape
+from datetime import datetime, timezone
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
 import uuid
@@ -15,6 +17,8 @@ logger = logging.getLogger(__name__)
 # Reuse existing auth and database infrastructure
 from auth import verify_supabase_token, AuthenticatedUser
 from database import get_service_supabase_client
+from ._email_assets import b64_file
+from ._resend_api import RESEND_API_KEY, post_email
 # Email templates import removed - using Supabase invite system
 
 router = APIRouter()
@@ -46,29 +50,8 @@ class RejectionRequest(BaseModel):
 
 # Custom approval email function removed - now using Supabase's built-in invite system
 
-async def send_notification_email(email: str, full_name: str, company_name: str = None, pdf_path: str = None, asset_name: str = None):
-    """Send email notification to support when user requests access, with optional PDF attachment"""
-    import resend
-    import base64
-
-    # Check if RESEND_API_KEY is configured
-    if not os.getenv("RESEND_API_KEY"):
-        print("Warning: RESEND_API_KEY not configured, simulating access request notification")
-        print(f"Simulated notification to support@arctecfox.co:")
-        print(f"  New access request from: {full_name} ({email})")
-        print(f"  Company: {company_name or 'Not specified'}")
-        print(f"  PDF attached: {pdf_path is not None}")
-        return {"status": "simulated"}
-
-    # Initialize Resend
-    resend.api_key = os.getenv("RESEND_API_KEY")
-
-    # Create access request notification email
-    subject = f"New Access Request & Free PM Plan - {full_name} from {company_name or 'Unknown Company'}"
-
-    pdf_info = f"<p><strong>✅ Free PM Plan:</strong> The user's generated PM plan for <strong>{asset_name}</strong> is attached to this email.</p>" if pdf_path else ""
-
-    html_content = f"""
+# Static markup built once at import; placeholders are filled with format_map per send
+_ACCESS_REQUEST_NOTIFICATION_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -95,8 +78,8 @@ async def send_notification_email(email: str, full_name: str, company_name: str
                     <strong>Requestor Details:</strong><br>
                     <strong>Name:</strong> {full_name}<br>
                     <strong>Email:</strong> {email}<br>
-                    <strong>Company:</strong> {company_name or 'Not specified'}<br>
-                    <strong>Requested:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M UTC')}
+                    <strong>Company:</strong> {company_name}<br>
+                    <strong>Requested:</strong> {requested_at}
                 </div>
 
                 <div class="success-box">
@@ -126,7 +109,35 @@ async def send_notification_email(email: str, full_name: str, company_name: str
     </html>
     """
 
+async def send_notification_email(email: str, full_name: str, company_name: str = None, pdf_path: str = None, asset_name: str = None, pdf_base64: str = None):
+    """
+    Send email notification to support when user requests access, with optional PDF attachment.
+    Pass pdf_base64 when the PDF has already been encoded for another email.
+    """
+    # Check if RESEND_API_KEY is configured
+    if not RESEND_API_KEY:
+        print("Warning: RESEND_API_KEY not configured, simulating access request notification")
+        print(f"Simulated notification to support@arctecfox.co:")
+        print(f"  New access request from: {full_name} ({email})")
+        print(f"  Company: {company_name or 'Not specified'}")
+        print(f"  PDF attached: {pdf_path is not None}")
+        return {"status": "simulated"}
+
     try:
+        # Create access request notification email
+        subject = f"New Access Request & Free PM Plan - {full_name} from {company_name or 'Unknown Company'}"
+
+        # User-supplied fields are escaped for the HTML body; the subject stays raw
+        pdf_info = f"<p><strong>✅ Free PM Plan:</strong> The user's generated PM plan for <strong>{escape(asset_name or '')}</strong> is attached to this email.</p>" if pdf_path else ""
+
+        html_content = _ACCESS_REQUEST_NOTIFICATION_HTML.format_map({
+            "full_name": escape(full_name or ''),
+            "email": escape(email or ''),
+            "company_name": escape(company_name or 'Not specified'),
+            "requested_at": datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC'),
+            "pdf_info": pdf_info,
+        })
+
         # Prepare email payload
         email_payload = {
             "from": "ArcTecFox PM Planner <notifications@arctecfox.ai>",
@@ -136,10 +147,10 @@ async def send_notification_email(email: str, full_name: str, company_name: str
         }
 
         # Add PDF attachment if provided
-        if pdf_path and os.path.exists(pdf_path):
-            with open(pdf_path, 'rb') as f:
-                pdf_content = f.read()
-            pdf_base64 = base64.b64encode(pdf_content).decode()
+        if pdf_path and (pdf_base64 is not None or os.path.exists(pdf_path)):
+            if pdf_base64 is None:
+                # Chunked encode in a worker thread - keeps the event loop free during disk I/O
+                pdf_base64 = await asyncio.to_thread(b64_file, pdf_path)
 
             filename = f"PM_Plan_{asset_name.replace(' ', '_')}.pdf" if asset_name else "PM_Plan.pdf"
             email_payload["attachments"] = [{
@@ -147,8 +158,8 @@ async def send_notification_email(email: str, full_name: str, company_name: str
                 "content": pdf_base64
             }]
 
-        # Send email using Resend
-        response = resend.Emails.send(email_payload)
+        # Send email using Resend (orjson body - the payload may carry the base64 PDF)
+        response = await post_email(email_payload)
 
         print(f"✅ Access request notification sent to support@arctecfox.co: {response}")
         return {"status": "sent", "email_id": response.get("id")}
@@ -159,7 +170,7 @@ async def send_notification_email(email: str, full_name: str, company_name: str
         return {"status": "failed", "error": str(e)}
 
 @router.post("/request-access", response_model=dict)
-async def create_access_request(request: AccessRequestCreate):
+async def create_access_request(request: AccessRequestCreate, background_tasks: BackgroundTasks):
     """Public endpoint to create access request - linked to test plan"""
     try:
         logger.info(f"[RequestAccess] New access request for email: {request.email}, lead_id: {request.lead_id}")
@@ -211,9 +222,10 @@ async def create_access_request(request: AccessRequestCreate):
 
         logger.info(f"[RequestAccess] Access request created successfully: {result.data[0].get('id')}")
 
-        # Send notification email to support
-        logger.info(f"[RequestAccess] Sending notification email to support for: {request.email}")
-        await send_notification_email(request.email, request.full_name, company_name)
+        # Notify support after the response is sent - the request is already saved,
+        # and send_notification_email never raises
+        logger.info(f"[RequestAccess] Queueing notification email to support for: {request.email}")
+        background_tasks.add_task(send_notification_email, request.email, request.full_name, company_name)
 
         logger.info(f"[RequestAccess] ✅ Access request flow completed for: {request.email}")
         return {
@@ -2,69 +2,100 @@
 Create site admin users - site/company agnostic access
 """
 import os
+import asyncio
+import logging
 from fastapi import HTTPException
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 from supabase import create_client, Client
+from postgrest.types import ReturnMethod
+from postgrest.exceptions import APIError
+from ttl_cache import TTLCache
 
-class SiteAdminRequest(BaseModel):
-    email: EmailStr
-    full_name: Optional[str] = None
+logger = logging.getLogger(__name__)
 
-async def create_site_admin(request: SiteAdminRequest, current_user_id: str = None):
-    """
-    Create a new site admin user with full access to all companies and sites.
-    Uses Supabase auth.admin to create user and send invitation email.
+_supabase_admin_client: Optional[Client] = None
 
-    Only existing site admins can create new site admins.
+
+def _get_supabase_admin_client() -> Client:
     """
-    try:
-        # Initialize Supabase client with service role key
+    Return the process-wide service-role Supabase client, creating it on first use.
+    Reusing one client keeps its underlying HTTP connection pool warm across requests.
+    """
+    global _supabase_admin_client
+    if _supabase_admin_client is None:
         supabase_url = os.getenv("SUPABASE_URL")
         supabase_key = os.getenv("SUPABASE_SERVICE_KEY") or os.getenv("SUPABASE_KEY")
 
         if not supabase_url or not supabase_key:
             raise HTTPException(status_code=500, detail="Missing Supabase service credentials")
 
-        supabase: Client = create_client(supabase_url, supabase_key)
-        print(f"✅ Using service role key for site admin creation")
+        _supabase_admin_client = create_client(supabase_url, supabase_key)
+    return _supabase_admin_client
 
-        # Verify current user is a site admin
-        if current_user_id:
-            current_user_response = supabase.table("users").select("site_admin").eq("id", current_user_id).single().execute()
-            if not current_user_response.data or not current_user_response.data.get('site_admin'):
-                raise HTTPException(status_code=403, detail="Only site admins can create new site admins")
 
-        # Check if user already exists
-        print(f"🔍 Checking if user {request.email} already exists...")
-        existing_user_response = supabase.table("users").select("id,email,site_admin").eq("email", request.email).execute()
+# Caller site_admin status, keyed by user id.
+# Short TTL so revoked admins lose access within a minute.
+_admin_cache = TTLCache(ttl=60, max_size=1024)
 
-        if existing_user_response.data and len(existing_user_response.data) > 0:
-            existing_user = existing_user_response.data[0]
 
-            # If user exists and is already a site admin
-            if existing_user.get('site_admin'):
-                raise HTTPException(status_code=400, detail="User is already a site admin")
-
-            # If user exists but is not a site admin, promote them
-            print(f"👤 Found existing user: {existing_user['id']} - promoting to site admin")
-            update_response = supabase.table("users").update({
-                "site_admin": True
-            }).eq("id", existing_user['id']).execute()
+class SiteAdminRequest(BaseModel):
+    email: EmailStr
+    full_name: Optional[str] = None
 
-            if update_response.error:
-                raise HTTPException(status_code=500, detail=f"Failed to promote user to site admin: {update_response.error}")
+async def create_site_admin(request: SiteAdminRequest, current_user_id: str = None):
+    """
+    Create a new site admin user with full access to all companies and sites.
+    Uses Supabase auth.admin to create user and send invitation email.
 
-            print(f"✅ User promoted to site admin successfully")
+    Only existing site admins can create new site admins.
+    """
+    try:
+        # Reuse the cached Supabase client with service role key
+        supabase: Client = _get_supabase_admin_client()
+        logger.debug("✅ Using service role key for site admin creation")
+
+        # Callers recently verified as site admins skip the check inside the RPC;
+        # callers recently rejected are turned away without a round trip
+        caller_is_admin = _admin_cache.get(current_user_id) if current_user_id else None
+        if caller_is_admin is False:
+            raise HTTPException(status_code=403, detail="Only site admins can create new site admins")
+
+        # Verify current user is a site admin and promote the target if they
+        # already exist - one round trip via the create_or_promote_site_admin RPC
+        logger.debug("🔍 Checking if user %s already exists...", request.email)
+        try:
+            rpc_response = supabase.rpc("create_or_promote_site_admin", {
+                "p_caller": None if caller_is_admin else current_user_id,
+                "p_email": request.email.lower()
+            }).execute()
+        except APIError as e:
+            raise HTTPException(status_code=500, detail=f"Failed to promote user to site admin: {e.message}")
+        outcome = rpc_response.data or {}
+        status = outcome.get("status")
+
+        if current_user_id and caller_is_admin is None:
+            _admin_cache.set(current_user_id, status != "forbidden")
+
+        if status == "forbidden":
+            raise HTTPException(status_code=403, detail="Only site admins can create new site admins")
+
+        # If user exists and is already a site admin
+        if status == "already_admin":
+            raise HTTPException(status_code=400, detail="User is already a site admin")
+
+        # If user existed but was not a site admin, they have now been promoted
+        if status == "promoted":
+            logger.info("✅ User %s promoted to site admin successfully", outcome["id"])
             return {
                 "success": True,
                 "message": f"Existing user {request.email} promoted to site admin",
-                "user_id": existing_user['id'],
+                "user_id": outcome["id"],
                 "promoted": True
             }
 
         # User doesn't exist - create new user and send invitation
-        print(f"📝 Creating new site admin user: {request.email}")
+        logger.debug("📝 Creating new site admin user: %s", request.email)
 
         # Get frontend URL for redirect
         frontend_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
@@ -85,47 +116,56 @@ async def create_site_admin(request: SiteAdminRequest, current_user_id: str = No
                 raise Exception("Failed to create user via Supabase Auth")
 
             created_user_id = auth_response.user.id
-            print(f"✅ Auth user created: {created_user_id}")
+            logger.info("✅ Auth user created: %s", created_user_id)
 
         except Exception as auth_error:
-            print(f"❌ Failed to create auth user: {str(auth_error)}")
+            logger.error("❌ Failed to create auth user: %s", auth_error)
             raise HTTPException(status_code=500, detail=f"Failed to create user account: {str(auth_error)}")
 
-        # Update users table to set site_admin = true
-        # Note: The users table might be a view or have triggers that sync with auth.users
-        print(f"🔧 Setting site_admin flag for user: {created_user_id}")
-        try:
-            update_response = supabase.table("users").update({
-                "site_admin": True,
-                "full_name": request.full_name or ""
-            }).eq("id", created_user_id).execute()
-
-            print(f"✅ site_admin flag set successfully")
-        except Exception as update_error:
-            # Log warning but don't fail - the user was created successfully
-            print(f"⚠️ Warning: Could not update users table directly: {str(update_error)}")
-            print(f"⚠️ User may need manual site_admin flag update")
-
-        # Send invitation email via Supabase
-        print(f"📧 Sending site admin invitation email to {request.email}")
-        try:
-            invite_response = supabase.auth.admin.invite_user_by_email(
-                email=request.email,
-                options={
-                    "data": {
-                        "full_name": request.full_name or "",
-                        "site_admin": True,
-                        "role": "site_admin"
-                    },
-                    "redirect_to": f"{frontend_url}/dashboard"
-                }
-            )
-
-            print(f"✅ Site admin invitation email sent successfully")
-
-        except Exception as email_error:
-            print(f"⚠️ User created but invitation email failed: {str(email_error)}")
-            # Don't fail - user was created, they can reset password
+        def set_site_admin_flag():
+            # Update users table to set site_admin = true
+            # Note: The users table might be a view or have triggers that sync with auth.users
+            logger.debug("🔧 Setting site_admin flag for user: %s", created_user_id)
+            try:
+                # Nothing is read back from the update, so skip returning the row
+                supabase.table("users").update({
+                    "site_admin": True,
+                    "full_name": request.full_name or ""
+                }, returning=ReturnMethod.minimal).eq("id", created_user_id).execute()
+
+                logger.debug("✅ site_admin flag set successfully")
+            except Exception as update_error:
+                # Log warning but don't fail - the user was created successfully
+                logger.warning("⚠️ Could not update users table directly: %s - user may need manual site_admin flag update", update_error)
+
+        def send_invitation():
+            # Send invitation email via Supabase
+            logger.debug("📧 Sending site admin invitation email to %s", request.email)
+            try:
+                supabase.auth.admin.invite_user_by_email(
+                    email=request.email,
+                    options={
+                        "data": {
+                            "full_name": request.full_name or "",
+                            "site_admin": True,
+                            "role": "site_admin"
+                        },
+                        "redirect_to": f"{frontend_url}/dashboard"
+                    }
+                )
+
+                logger.info("✅ Site admin invitation email sent to %s", request.email)
+
+            except Exception as email_error:
+                logger.warning("⚠️ User created but invitation email failed: %s", email_error)
+                # Don't fail - user was created, they can reset password
+
+        # The flag update and the invitation are independent - run them concurrently.
+        # Each step handles its own errors so one failing never cancels the other.
+        await asyncio.gather(
+            asyncio.to_thread(set_site_admin_flag),
+            asyncio.to_thread(send_invitation)
+        )
 
         return {
             "success": True,
@@ -137,5 +177,5 @@ async def create_site_admin(request: SiteAdminRequest, current_user_id: str = No
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error creating site admin: {str(e)}")
+        logger.error("❌ Error creating site admin: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to create site admin: {str(e)}")
@@ -3,46 +3,105 @@ Email confirmation functions for free PM plan flow
 Now using Resend Templates for HTML/copy.
 """
 import os
+import string
+from html import escape
+import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 
+from ._resend_api import RESEND_API_KEY, send_with_retry
+from ._email_assets import b64_file, logo_attachment
+
 logger = logging.getLogger(__name__)
 
+# Link targets used in the email templates, read once at import
+_BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
+_FRONTEND_URL = os.getenv("FRONTEND_URL", "https://arctecfox-mono.vercel.app")
+_DEMO_URL = os.getenv("DEMO_URL", f"{_FRONTEND_URL}/demo")
+
+# Fixed parts of the template-based sends; only the variables change per email
+_FROM_ADDRESS = "ArcTecFox PM Planner <notifications@arctecfox.ai>"
+_CONFIRMATION_SUBJECT = "Confirm Your Email to Receive Your Free PM Plan"
+_CONFIRMATION_TEMPLATE_ID = "arctecfox-confirmation-email"  # Resend template ID/alias
+_DELIVERY_TEMPLATE_ID = "arctecfox-pm-plan-delivery"
+
+# Copyright year for the email footers; a process that runs over New Year
+# keeps the old year until its next restart, which is fine for a footer.
+_CURRENT_YEAR = datetime.now(timezone.utc).year
+
+# Parsed once at import; only the per-lead fields are substituted on each send.
+_PLAN_NOTIFICATION_HTML = string.Template("""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <style>
+            body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; margin: 0; padding: 0; }
+            .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+            .header { background-color: #3b82f6; color: white; padding: 20px; text-align: center; border-radius: 5px 5px 0 0; }
+            .content { background-color: #f9f9f9; padding: 30px; border: 1px solid #ddd; border-radius: 0 0 5px 5px; }
+            .info-box { margin: 15px 0; padding: 15px; background: white; border-left: 4px solid #22c55e; }
+            .footer { margin-top: 30px; padding-top: 20px; border-top: 1px solid #ddd; font-size: 12px; color: #666; }
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1>✅ PM Plan Email Confirmed</h1>
+            </div>
+            <div class="content">
+                <p>A user has confirmed their email and received their free PM plan:</p>
+
+                <div class="info-box">
+                    <strong>User Details:</strong><br>
+                    <strong>Name:</strong> $full_name<br>
+                    <strong>Email:</strong> $email<br>
+                    <strong>Company:</strong> $company_name<br>
+                    <strong>Asset:</strong> $asset_name<br>
+                    <strong>Confirmed:</strong> $confirmed_at
+                </div>
+
+                <p>This user has confirmed their email and received their PM plan PDF.</p>
+
+                <div class="footer">
+                    <p>This is an automated notification from ArcTecFox PM Planner.</p>
+                    <p>Please do not reply to this email.</p>
+                    <p>&copy; $year ArcTecFox. All rights reserved.</p>
+                </div>
+            </div>
+        </div>
+    </body>
+    </html>
+    """)
+
 
-def _load_logo_bytes() -> Optional[bytes]:
+async def _send_resend(params: dict, description: str, *, allow_failure: bool = False) -> dict:
     """
-    Load the ArcTecFox logo from the frontend assets folder and return raw bytes.
-    Returns None if the file cannot be found/read.
+    Send one email through Resend (with retries), or simulate it when no API key
+    is configured. Returns {"status": "sent" | "simulated" | "failed", ...}.
+    Errors are re-raised unless allow_failure is set.
     """
-    try:
-        # email_confirmations.py is at:
-        # apps/welcome/backend/api/email_confirmations.py
-        # logo is at:
-        # apps/welcome/frontend/public/assets/ArcTecFox-logo.jpg
-        current_dir = os.path.dirname(__file__)
-        logo_path = os.path.abspath(
-            os.path.join(
-                current_dir,
-                "..",        # -> backend
-                "..",        # -> welcome
-                "frontend",
-                "public",
-                "assets",
-                "ArcTecFox-logo.jpg",
-            )
-        )
-
-        if not os.path.exists(logo_path):
-            logger.warning(f"Logo file not found at {logo_path}; emails will be sent without inline logo.")
-            return None
-
-        with open(logo_path, "rb") as f:
-            return f.read()
+    recipients = ", ".join(params["to"])
+
+    if not RESEND_API_KEY:
+        logger.warning(f"RESEND_API_KEY not configured, simulating {description}")
+        print(f"Simulated {description} to: {recipients}")
+        variables = params.get("template", {}).get("variables")
+        if variables:
+            print(f"  Template variables: {variables}")
+        return {"status": "simulated"}
 
+    try:
+        response = await send_with_retry(params)
     except Exception as e:
-        logger.error(f"Error loading logo for email: {e}")
-        return None
+        logger.error(f"❌ Error sending {description}: {e}")
+        if allow_failure:
+            return {"status": "failed", "error": str(e)}
+        raise
+
+    logger.info(f"✅ Sent {description} to {recipients}: {response}")
+    email_id = response.get("id") if isinstance(response, dict) else None
+    return {"status": "sent", "email_id": email_id}
 
 
 async def send_confirmation_email(email: str, full_name: str, token: str, asset_name: str):
@@ -51,49 +110,26 @@ async def send_confirmation_email(email: str, full_name: str, token: str, asset_
 
     Subject: "Confirm Your Email to Receive Your Free PM Plan"
     """
-    import resend
-
-    if not os.getenv("RESEND_API_KEY"):
-        logger.warning("RESEND_API_KEY not configured, simulating confirmation email")
-        print(f"Simulated confirmation email to: {email}")
-        print(f"  Confirmation token: {token}")
-        print(f"  Asset: {asset_name}")
-        return {"status": "simulated"}
-
-    resend.api_key = os.getenv("RESEND_API_KEY")
-
     # Build confirmation URL (backend route that handles token)
-    backend_url = os.getenv("BACKEND_URL", "http://localhost:8000")
-    confirmation_link = f"{backend_url}/api/confirm-email/{token}"
-
-    # ✅ New subject line
-    subject = "Confirm Your Email to Receive Your Free PM Plan"
+    confirmation_link = f"{_BACKEND_URL}/api/confirm-email/{token}"
 
     # Inline logo attachment (CID)
-    logo_bytes = _load_logo_bytes()
-    attachments = []
-
-    if logo_bytes:
-        attachments.append({
-            "filename": "ArcTecFox-logo.jpg",
-            "content": list(logo_bytes),   # raw bytes -> list[int], per Resend docs
-            "content_id": "arcfox-logo",   # must match src="cid:arcfox-logo" in the template
-            "content_type": "image/jpeg",
-        })
+    logo = logo_attachment()
+    attachments = [logo] if logo else []
 
     safe_name = full_name or "there"
 
     params = {
-        "from": "ArcTecFox PM Planner <notifications@arctecfox.ai>",
+        "from": _FROM_ADDRESS,
         "to": [email],
-        "subject": subject,
+        "subject": _CONFIRMATION_SUBJECT,
         "template": {
-            "id": "arctecfox-confirmation-email",  # Resend template ID/alias
+            "id": _CONFIRMATION_TEMPLATE_ID,
             "variables": {
                 "name": safe_name,
                 "asset_name": asset_name,
                 "confirm_url": confirmation_link,
-                "year": datetime.utcnow().year,
+                "year": _CURRENT_YEAR,
             },
         },
     }
@@ -101,92 +137,59 @@ async def send_confirmation_email(email: str, full_name: str, token: str, asset_
     if attachments:
         params["attachments"] = attachments
 
-    try:
-        response = resend.Emails.send(params)
-        logger.info(f"✅ Confirmation email sent to {email}: {response}")
-        email_id = response.get("id") if isinstance(response, dict) else None
-        return {"status": "sent", "email_id": email_id}
-
-    except Exception as e:
-        logger.error(f"❌ Error sending confirmation email: {e}")
-        raise
+    return await _send_resend(params, "confirmation email")
 
 
-async def send_delivery_email(email: str, full_name: str, pdf_path: str, asset_name: str):
+async def send_delivery_email(email: str, full_name: str, pdf_path: str, asset_name: str, pdf_base64: Optional[str] = None):
     """
     Email #2 – PM Plan Delivery (Resend Template: arcfox-pm-plan-delivery)
 
     Subject: "Your Preventive Maintenance Plan for {asset_name} Is Ready"
-    """
-    import resend
-
-    if not os.getenv("RESEND_API_KEY"):
-        logger.warning("RESEND_API_KEY not configured, simulating delivery email")
-        print(f"Simulated delivery email to: {email}")
-        print(f"  PDF path: {pdf_path}")
-        return {"status": "simulated"}
-
-    resend.api_key = os.getenv("RESEND_API_KEY")
-
-    frontend_url = os.getenv("FRONTEND_URL", "https://arctecfox-mono.vercel.app")
-    demo_url = os.getenv("DEMO_URL", f"{frontend_url}/demo")
 
+    pdf_base64 is the already-encoded PDF when the caller attaches it to more
+    than one email; otherwise pdf_path is read and encoded here.
+    """
     # ✅ New subject line, personalized with asset name
     subject = f"Your Preventive Maintenance Plan for {asset_name} Is Ready"
 
-    # Attach logo as CID
-    logo_bytes = _load_logo_bytes()
-    attachments = []
-
-    if logo_bytes:
-        attachments.append({
-            "filename": "ArcTecFox-logo.jpg",
-            "content": list(logo_bytes),
-            "content_id": "arcfox-logo",
-            "content_type": "image/jpeg",
-        })
-
-    # Attach PDF plan
-    try:
-        with open(pdf_path, "rb") as f:
-            pdf_bytes = f.read()
-    except FileNotFoundError:
-        logger.error(f"PDF not found at {pdf_path}")
-        raise
+    # Attach PDF plan (base64 string, encoded in chunks off the event loop)
+    pdf_content = pdf_base64
+    if pdf_content is None:
+        try:
+            pdf_content = await asyncio.to_thread(b64_file, pdf_path)
+        except FileNotFoundError:
+            logger.error(f"PDF not found at {pdf_path}")
+            raise
 
-    attachments.append({
+    pdf_attachment = {
         "filename": f"PM_Plan_{asset_name.replace(' ', '_')}.pdf",
-        "content": list(pdf_bytes),
+        "content": pdf_content,
         "content_type": "application/pdf",
-    })
+    }
+
+    # Logo as CID first, then the PDF
+    logo = logo_attachment()
+    attachments = [logo, pdf_attachment] if logo else [pdf_attachment]
 
     safe_name = full_name or "there"
 
     params = {
-        "from": "ArcTecFox PM Planner <notifications@arctecfox.ai>",
+        "from": _FROM_ADDRESS,
         "to": [email],
         "subject": subject,
         "template": {
-            "id": "arctecfox-pm-plan-delivery",
+            "id": _DELIVERY_TEMPLATE_ID,
             "variables": {
                 "name": safe_name,
                 "asset_name": asset_name,
-                "demo_url": demo_url,
-                "year": datetime.utcnow().year,
+                "demo_url": _DEMO_URL,
+                "year": _CURRENT_YEAR,
             },
         },
         "attachments": attachments,
     }
 
-    try:
-        response = resend.Emails.send(params)
-        logger.info(f"✅ Delivery email sent to {email}: {response}")
-        email_id = response.get("id") if isinstance(response, dict) else None
-        return {"status": "sent", "email_id": email_id}
-
-    except Exception as e:
-        logger.error(f"❌ Error sending delivery email: {e}")
-        raise
+    return await _send_resend(params, "delivery email")
 
 
 async def send_plan_generated_notification(email: str, full_name: str, company_name: str, asset_name: str):
@@ -194,73 +197,23 @@ async def send_plan_generated_notification(email: str, full_name: str, company_n
     Internal notification to support when a free PM plan email is confirmed.
     (Still using inline HTML; can be converted to a template later if you want.)
     """
-    import resend
-
-    if not os.getenv("RESEND_API_KEY"):
-        logger.warning("RESEND_API_KEY not configured, simulating support notification")
-        print(f"Simulated support notification for: {email}")
-        return {"status": "simulated"}
-
-    resend.api_key = os.getenv("RESEND_API_KEY")
-
     subject = f"New PM Plan Confirmed - {full_name} from {company_name}"
 
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; margin: 0; padding: 0; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-            .header {{ background-color: #3b82f6; color: white; padding: 20px; text-align: center; border-radius: 5px 5px 0 0; }}
-            .content {{ background-color: #f9f9f9; padding: 30px; border: 1px solid #ddd; border-radius: 0 0 5px 5px; }}
-            .info-box {{ margin: 15px 0; padding: 15px; background: white; border-left: 4px solid #22c55e; }}
-            .footer {{ margin-top: 30px; padding-top: 20px; border-top: 1px solid #ddd; font-size: 12px; color: #666; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>✅ PM Plan Email Confirmed</h1>
-            </div>
-            <div class="content">
-                <p>A user has confirmed their email and received their free PM plan:</p>
-
-                <div class="info-box">
-                    <strong>User Details:</strong><br>
-                    <strong>Name:</strong> {full_name}<br>
-                    <strong>Email:</strong> {email}<br>
-                    <strong>Company:</strong> {company_name}<br>
-                    <strong>Asset:</strong> {asset_name}<br>
-                    <strong>Confirmed:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M UTC')}
-                </div>
-
-                <p>This user has confirmed their email and received their PM plan PDF.</p>
-
-                <div class="footer">
-                    <p>This is an automated notification from ArcTecFox PM Planner.</p>
-                    <p>Please do not reply to this email.</p>
-                    <p>&copy; {datetime.utcnow().year} ArcTecFox. All rights reserved.</p>
-                </div>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-
-    try:
-        response = resend.Emails.send({
-            "from": "ArcTecFox PM Planner <notifications@arctecfox.ai>",
-            "to": ["support@arctecfox.co"],
-            "subject": subject,
-            "html": html_content,
-        })
+    html_content = _PLAN_NOTIFICATION_HTML.substitute(
+        full_name=escape(full_name or ""),
+        email=escape(email or ""),
+        company_name=escape(company_name or ""),
+        asset_name=escape(asset_name or ""),
+        confirmed_at=datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC'),
+        year=_CURRENT_YEAR,
+    )
 
-        logger.info(f"✅ Plan confirmation notification sent to support: {response}")
-        email_id = response.get("id") if isinstance(response, dict) else None
-        return {"status": "sent", "email_id": email_id}
+    params = {
+        "from": _FROM_ADDRESS,
+        "to": ["support@arctecfox.co"],
+        "subject": subject,
+        "html": html_content,
+    }
 
-    except Exception as e:
-        logger.error(f"❌ Error sending support notification: {e}")
-        # Don't fail the request if notification fails
-        return {"status": "failed", "error": str(e)}
+    # Don't fail the request if notification fails
+    return await _send_resend(params, "support notification", allow_failure=True)
@@ -1,17 +1,29 @@
 # generate_pm_plan.py
 
-from fastapi import APIRouter, HTTPException, Request
-from pydantic import BaseModel
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel, ConfigDict, StrictBool, TypeAdapter, ValidationError, field_validator
+from datetime import date, datetime, timezone
+import asyncio
+import hashlib
 import logging
+import time
 import os
-import json
-from typing import Optional, Any, Dict
+import orjson
+from typing import Optional, Any, Dict, List, Tuple
 from config import get_gemini_model
+from ttl_cache import TTLCache
+from auth import verify_supabase_token, AuthenticatedUser
 
 router = APIRouter()
 logger = logging.getLogger("main")
 
+# Shared across requests; get_gemini_model caches instances per settings
+_PM_PLAN_MODEL = get_gemini_model(
+    temperature=0.4,
+    response_mime_type="application/json",
+    system_instruction="Always return pure JSON, no markdown, no prose outside the JSON."
+)
+
 # ============
 # Input model
 # ============
@@ -35,18 +47,9 @@ class PMPlanInput(BaseModel):
 # =================
 # Prompt generator
 # =================
-def generate_prompt(data: PMPlanInput) -> str:
-    today = datetime.utcnow().date().isoformat()
-    parent_asset = data.parent_asset if data.parent_asset else "Not applicable"
-    child_asset = data.child_asset if data.child_asset else "Not applicable"
-    site_location = data.site_location if data.site_location else "Not applicable"
-    environment = data.environment if data.environment else "Not applicable"
-    hours = data.hours if data.hours else "Not applicable"
-    frequency = data.frequency if data.frequency else "Not applicable"
-    criticality = data.criticality if data.criticality else "Medium"
-    addl = data.additional_context if data.additional_context else "Not applicable"
-
-    return f"""
+# Static plain string, never formatted - the braces in the JSON examples are
+# literal. Only the trailing _PROMPT_CONTEXT block is formatted per request.
+_PROMPT_INSTRUCTIONS = """
 ROLE & SCOPE
 You are an expert in enterprise asset management, industrial machinery, and preventive maintenance planning. 
 You have deep knowledge of rotating equipment, mechanical systems, electrical systems, and control systems across 
@@ -55,17 +58,6 @@ multiple industries. You generate authoritative, standard-compliant preventive m
 Produce a child-asset/component-level PM plan for the specified child asset (component scope only).
 
 
-UNIVERSAL CONTEXT (inherits unless overridden at task level)
-- Parent Asset: {parent_asset}
-- Child Asset: {child_asset}
-- Site Location: {site_location}
-- Environment: {environment}
-- Cumulative Runtime Hours: {hours} (calculated as weeks since installation × parent asset's weekly operating hours)
-- PM Frequency: {frequency}
-- Criticality: {criticality}
-- Additional Context: {addl}
-- Plan Start Date: {today}
-
 IMPORTANT - Runtime Hours Context:
 The provided runtime hours represent the total accumulated operating hours since the child asset's installation date. This value is calculated by multiplying the number of weeks between the installation date and today by the parent asset's weekly operating hours. Use this cumulative runtime to inform maintenance intervals based on actual equipment usage rather than calendar time alone. Higher cumulative hours may require more frequent maintenance intervals to prevent wear-related failures.
 
@@ -102,7 +94,7 @@ CHILD-ASSET SCOPE NOTES
 - Include lubrication tasks when applicable; identify grease points/zones if known. Provide specific product/type/quantity when available (prefer OEM), otherwise standards/suppliers with citations.
 
 TASK NAMING CONVENTION
-- task_name = "{child_asset} – {{Action}} – {{Area/Subsystem}}" (no marketing fluff).
+- task_name = "{Child Asset} – {Action} – {Area/Subsystem}" (no marketing fluff).
 
 HALLUCINATION GUARDRAILS
 - Never fabricate part numbers or brand-specific specs. If not known credibly, choose a conservative, widely accepted default and record rationale in "assumptions".
@@ -129,11 +121,11 @@ REQUIRED FIELDS for each task (never omit; use "Not applicable" where needed):
 - "inherits_parent_context" (bool),
 - "context_overrides" (object with allowed keys: site_location, environment, operating_hours, criticality; empty if none)
 
-FEW-SHOT EXAMPLE (ABBREVIATED; 1 task)
-{{
-  "parent_asset": "{parent_asset}",
-  "child_asset": "{child_asset}",
-  "task_name": "{child_asset} – Bearing Lubrication – Drive End",
+FEW-SHOT EXAMPLE (ABBREVIATED; 1 task; placeholder names, see SUBSTITUTIONS)
+{
+  "parent_asset": "ACME-Pump-01",
+  "child_asset": "Bearing-DE",
+  "task_name": "Bearing-DE – Bearing Lubrication – Drive End",
   "maintenance_interval": 4,
   "instructions": [
     "Lock out/tag out per site policy",
@@ -143,10 +135,10 @@ FEW-SHOT EXAMPLE (ABBREVIATED; 1 task)
     "Wipe excess and re-install fitting cap"
   ],
   "reason": "Maintain adequate film and prevent bearing wear due to lubricant depletion",
-  "engineering_rationale": "Approx. monthly (4 weeks) interval aligned to continuous operation in {environment}; adjust if temperature trending indicates",
+  "engineering_rationale": "Approx. monthly (4 weeks) interval aligned to continuous operation in DEFAULT-ENV; adjust if temperature trending indicates",
   "safety_precautions": ["PPE per site policy", "LOTO before contact with rotating equipment"],
   "common_failures_prevented": ["Bearing overheating", "Premature wear", "Seizure"],
-  "usage_insights": "With {hours} cumulative runtime hours since installation, consider trending vibration/temperature to optimize interval based on actual usage patterns",
+  "usage_insights": "With DEFAULT-HOURS cumulative runtime hours since installation, consider trending vibration/temperature to optimize interval based on actual usage patterns",
   "tools_needed": ["Grease gun with zerk coupler", "Clean lint-free wipes"],
   "number_of_technicians": 1,
   "estimated_time_minutes": 15,
@@ -157,31 +149,142 @@ FEW-SHOT EXAMPLE (ABBREVIATED; 1 task)
   "assumptions": ["OEM spec calls for NLGI #2; quantity verified on nameplate/manual"],
   "citations": ["ISO 17359 – Condition monitoring", "SKF Grease Guide"],
   "inherits_parent_context": true,
-  "context_overrides": {{}}
-}}
+  "context_overrides": {}
+}
 
 FINAL OUTPUT REQUIREMENTS
 - Return ONE JSON object only, no extra text.
 - Begin your output immediately with:
-{{
+{
   "maintenance_plan": [
 
 SCHEMA REMINDER
-{{
-  "maintenance_plan": [ {{task1}}, {{task2}}, ... ]
-}}
+{
+  "maintenance_plan": [ {task1}, {task2}, ... ]
+}
+"""
+
+# Per-request values go last - the instructions above are a plain string (literal
+# braces, never formatted), so every prompt shares them as an identical prefix for
+# Gemini's implicit prompt caching and only this block is formatted per request.
+_PROMPT_CONTEXT = """
+UNIVERSAL CONTEXT (inherits unless overridden at task level)
+- Parent Asset: {parent_asset}
+- Child Asset: {child_asset}
+- Site Location: {site_location}
+- Environment: {environment}
+- Cumulative Runtime Hours: {hours} (calculated as weeks since installation × parent asset's weekly operating hours)
+- PM Frequency: {frequency}
+- Criticality: {criticality}
+- Additional Context: {addl}
+- Plan Start Date: {today}
+
+SUBSTITUTIONS (apply to the few-shot example)
+- Replace ACME-Pump-01 with {parent_asset}; Bearing-DE with {child_asset}; DEFAULT-ENV with {environment}; DEFAULT-HOURS with {hours}
 """
 
 
+# (UTC day number, ISO date) - the date string is only rebuilt when the day changes
+_today_cache: Tuple[int, str] = (-1, "")
+
+
+def _today_iso() -> str:
+    """Today's UTC date as YYYY-MM-DD."""
+    global _today_cache
+    day = int(time.time() // 86400)
+    if day != _today_cache[0]:
+        _today_cache = (day, datetime.fromtimestamp(day * 86400, timezone.utc).date().isoformat())
+    return _today_cache[1]
+
+
+def generate_prompt(data: PMPlanInput) -> str:
+    return _PROMPT_INSTRUCTIONS + _PROMPT_CONTEXT.format_map({
+        "parent_asset": data.parent_asset or "Not applicable",
+        "child_asset": data.child_asset or "Not applicable",
+        "site_location": data.site_location or "Not applicable",
+        "environment": data.environment or "Not applicable",
+        "hours": data.hours or "Not applicable",
+        "frequency": data.frequency or "Not applicable",
+        "criticality": data.criticality or "Medium",
+        "addl": data.additional_context or "Not applicable",
+        "today": _today_iso(),
+    })
+
+
 # =====================
 # Validation utilities
 # =====================
-def _is_number(value: Any) -> bool:
-    try:
-        float(value)
-        return True
-    except (TypeError, ValueError):
-        return False
+# Accepted criticality_rating values, compared case-insensitively
+_CRITICALITY_LEVELS = frozenset({"high", "medium", "low"})
+
+
+class _PlanTask(BaseModel):
+    """
+    Shape of one AI-generated task. Used only to validate the raw output - the
+    frontend receives the task dicts as the model returned them.
+    Every field is required (even if "Not applicable"); extra keys are allowed.
+    """
+    model_config = ConfigDict(extra="allow")
+
+    parent_asset: Any
+    child_asset: Any
+    task_name: Any
+    maintenance_interval: float
+    instructions: Any
+    reason: Any
+    engineering_rationale: Any
+    safety_precautions: Any
+    common_failures_prevented: Any
+    usage_insights: Any
+    tools_needed: Any
+    number_of_technicians: Any
+    estimated_time_minutes: float
+    consumables: Any
+    risk_assessment: Any
+    criticality_rating: str
+    comments: Any
+    assumptions: Any
+    citations: Any
+    inherits_parent_context: StrictBool
+    context_overrides: dict
+    scheduled_dates: Any = None  # validated only when present
+
+    @field_validator("criticality_rating")
+    @classmethod
+    def _check_criticality(cls, value: str) -> str:
+        if value.strip().lower() not in _CRITICALITY_LEVELS:
+            raise ValueError("invalid criticality")
+        return value
+
+    @field_validator("scheduled_dates")
+    @classmethod
+    def _reject_scheduled_dates(cls, value: Any) -> Any:
+        raise ValueError("scheduled_dates is not allowed")
+
+
+# Built once; validates the whole task list in a single pydantic-core pass
+_TASKS_ADAPTER = TypeAdapter(List[_PlanTask])
+
+# Error text per field, matching what the frontend and logs have always shown
+_FIELD_ERRORS = {
+    "maintenance_interval": "must be numeric (weeks)",
+    "estimated_time_minutes": "must be numeric (minutes)",
+    "criticality_rating": "must be one of High, Medium, Low",
+    "inherits_parent_context": "must be boolean",
+    "context_overrides": "must be an object (dict)",
+    "scheduled_dates": "must NOT be included; use maintenance_interval in weeks instead",
+}
+
+
+def _format_task_error(error: Dict[str, Any]) -> str:
+    idx, *field = error["loc"]
+    path = f"maintenance_plan[{idx}]"
+    if not field:
+        return f"{path} is not an object"
+    key = field[0]
+    if error["type"] == "missing":
+        return f"{path}.{key} is missing"
+    return f"{path}.{key} {_FIELD_ERRORS.get(key, error['msg'])}"
 
 
 def _validate_plan_structure(plan_json: Dict[str, Any]) -> None:
@@ -196,147 +299,254 @@ def _validate_plan_structure(plan_json: Dict[str, Any]) -> None:
     if not isinstance(tasks, list) or len(tasks) == 0:
         raise HTTPException(status_code=422, detail="'maintenance_plan' must be a non-empty array of task objects.")
 
-    errors = []
-    for idx, task in enumerate(tasks):
-        path = f"maintenance_plan[{idx}]"
-        if not isinstance(task, dict):
-            errors.append(f"{path} is not an object")
-            continue
-
-        # Required keys presence (even if "Not applicable")
-        required_keys = [
-            "parent_asset", "child_asset", "task_name", "maintenance_interval", "instructions",
-            "reason", "engineering_rationale", "safety_precautions", "common_failures_prevented",
-            "usage_insights", "tools_needed", "number_of_technicians", "estimated_time_minutes",
-            "consumables", "risk_assessment", "criticality_rating", "comments", "assumptions",
-            "citations", "inherits_parent_context", "context_overrides"
-        ]
-        for key in required_keys:
-            if key not in task:
-                errors.append(f"{path}.{key} is missing")
-
-        # Numeric validations
-        if "maintenance_interval" in task and not _is_number(task.get("maintenance_interval")):
-            errors.append(f"{path}.maintenance_interval must be numeric (weeks)")
-        if "estimated_time_minutes" in task and not _is_number(task.get("estimated_time_minutes")):
-            errors.append(f"{path}.estimated_time_minutes must be numeric (minutes)")
-
-        # Enum validation for criticality_rating
-        if "criticality_rating" in task:
-            val = task.get("criticality_rating")
-            if not isinstance(val, str) or val.strip().title() not in {"High", "Medium", "Low"}:
-                errors.append(f"{path}.criticality_rating must be one of High, Medium, Low")
-
-        # Type expectations
-        if "inherits_parent_context" in task and not isinstance(task.get("inherits_parent_context"), bool):
-            errors.append(f"{path}.inherits_parent_context must be boolean")
-        if "context_overrides" in task and not isinstance(task.get("context_overrides"), dict):
-            errors.append(f"{path}.context_overrides must be an object (dict)")
-
-        # Disallow deprecated or off-spec fields
-        if "scheduled_dates" in task:
-            errors.append(f"{path}.scheduled_dates must NOT be included; use maintenance_interval in weeks instead")
-
-    if errors:
+    try:
+        _TASKS_ADAPTER.validate_python(tasks)
+    except ValidationError as e:
+        errors = [_format_task_error(err) for err in e.errors()]
         raise HTTPException(status_code=422, detail={"validation_errors": errors})
 
 
-# ==========
-# Endpoint
-# ==========
-@router.post("/api/generate-ai-plan")
-async def generate_ai_plan(input: PMPlanInput, request: Request):
-    logger.info(f"🚀 Received AI plan request: {input.name}")
+# ==============
+# Runtime hours
+# ==============
+# Parent assets' hours_run_per_week, cached per parent id. Generating plans for
+# every child of a parent then reads the parent once. Parents are edited from the
+# frontend straight through Supabase, so entries simply expire after the TTL.
+_hours_cache = TTLCache(ttl=300, max_size=1024)
 
-    # Calculate runtime hours if parent_asset and child_asset data is available
-    calculated_hours = input.hours
 
-    if hasattr(input, 'parent_asset_id') and hasattr(input, 'child_asset_id') and input.parent_asset_id and input.child_asset_id:
-        try:
-            from database import get_service_supabase_client
-            service_client = get_service_supabase_client()
+def _runtime_hours(install_date: Any, hours_run_per_week: Any) -> Optional[str]:
+    """
+    Cumulative runtime hours: weeks since the install date (plan_start_date) x the
+    parent's hours_run_per_week. None if either value is missing.
+    """
+    if not (hours_run_per_week and install_date):
+        return None
 
-            # Fetch parent asset's hours_run_per_week
-            parent_response = service_client.table('parent_assets').select('hours_run_per_week').eq('id', input.parent_asset_id).limit(1).execute()
+    # Parse install date
+    if isinstance(install_date, str):
+        install_date = datetime.fromisoformat(install_date.replace('Z', '+00:00')).date()
+    elif isinstance(install_date, datetime):
+        install_date = install_date.date()
 
-            if parent_response.data and len(parent_response.data) > 0:
-                hours_run_per_week = parent_response.data[0].get('hours_run_per_week')
+    # Total hours = days since install x weekly hours / 7, floored in one step
+    # (integer math when hours_run_per_week is an integer)
+    days_since_install = date.today().toordinal() - install_date.toordinal()
+    total_hours = max(0, int(days_since_install * hours_run_per_week // 7))
 
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(f"📊 Runtime hours calculated: {total_hours} hours (weeks: {days_since_install / 7:.1f}, weekly_hours: {hours_run_per_week})")
+    return str(total_hours)
+
+
+def _fetch_runtime_hours(pairs: List[Tuple[str, str]]) -> Dict[str, str]:
+    """
+    Runtime hours for (parent_asset_id, child_asset_id) pairs, keyed by child id,
+    from a single child_assets query however many children are asked for.
+    Children without the data (or whose parent doesn't match) are left out, so the
+    caller keeps the submitted hours. Blocking (sync Supabase client).
+    """
+    try:
+        from database import get_service_supabase_client
+        service_client = get_service_supabase_client()
+
+        # One round trip: the children's install dates (plan_start_date), plus the
+        # parents' hours_run_per_week embedded through the parent_asset_id FK
+        # unless every parent is already cached
+        expected_parent = {child_id: parent_id for parent_id, child_id in pairs}
+        weekly_hours = {parent_id: _hours_cache.get(parent_id) for parent_id, _ in pairs}
+        columns = 'id, parent_asset_id, plan_start_date'
+        if None in weekly_hours.values():
+            columns += ', parent_assets(hours_run_per_week)'
+        response = service_client.table('child_assets')\
+            .select(columns)\
+            .in_('id', list(expected_parent))\
+            .execute()
+
+        runtime_hours = {}
+        for row in response.data or []:
+            child_id, parent_id = row.get('id'), row.get('parent_asset_id')
+            if expected_parent.get(child_id) != parent_id:
+                continue
+            hours_run_per_week = weekly_hours.get(parent_id)
+            if hours_run_per_week is None:
+                hours_run_per_week = (row.get('parent_assets') or {}).get('hours_run_per_week')
                 if hours_run_per_week:
-                    # Fetch child asset's install date (plan_start_date)
-                    child_response = service_client.table('child_assets').select('plan_start_date').eq('id', input.child_asset_id).limit(1).execute()
-
-                    if child_response.data and len(child_response.data) > 0:
-                        install_date = child_response.data[0].get('plan_start_date')
-
-                        if install_date:
-                            from datetime import datetime, date
-
-                            # Parse install date
-                            if isinstance(install_date, str):
-                                install_date = datetime.fromisoformat(install_date.replace('Z', '+00:00')).date()
-                            elif isinstance(install_date, datetime):
-                                install_date = install_date.date()
-
-                            # Calculate weeks since install and total hours
-                            current_date = date.today()
-                            weeks_since_install = (current_date - install_date).days / 7
-                            total_hours = max(0, int(weeks_since_install * hours_run_per_week))
-                            calculated_hours = str(total_hours)
-
-                            logger.info(f"📊 Runtime hours calculated: {calculated_hours} hours (weeks: {weeks_since_install:.1f}, weekly_hours: {hours_run_per_week})")
-        except Exception as e:
-            logger.warning(f"⚠️ Failed to calculate runtime hours: {e}")
-
-    # Create modified input with calculated hours
-    modified_input = PMPlanInput(
-        name=input.name,
-        model=input.model,
-        serial=input.serial,
-        category=input.category,
-        hours=calculated_hours,
-        frequency=input.frequency,
-        criticality=input.criticality,
-        additional_context=input.additional_context,
-        parent_asset=input.parent_asset,
-        child_asset=input.child_asset,
-        site_location=input.site_location,
-        environment=input.environment,
-        parent_asset_id=getattr(input, 'parent_asset_id', None),
-        child_asset_id=getattr(input, 'child_asset_id', None)
+                    _hours_cache.set(parent_id, hours_run_per_week)
+                    weekly_hours[parent_id] = hours_run_per_week
+            total_hours = _runtime_hours(row.get('plan_start_date'), hours_run_per_week)
+            if total_hours is not None:
+                runtime_hours[child_id] = total_hours
+        return runtime_hours
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to calculate runtime hours: {e}")
+        return {}
+
+
+# ==================
+# Gemini generation
+# ==================
+# Generations in flight, keyed by the prompt's SHA-256. An identical request
+# (double submit, client retry) that arrives while one is running awaits the
+# same task instead of paying for a second Gemini call.
+_inflight_plans: Dict[str, asyncio.Task] = {}
+
+# Validated plans by prompt SHA-256. The prompt holds every input that shapes the
+# plan (asset, context, runtime hours, today's date), so an identical prompt can
+# reuse the earlier answer. Plans are ~10-30KB each.
+_plan_cache = TTLCache(ttl=24 * 60 * 60, max_size=256)
+
+# 8192 output tokens is roughly 32K characters; anything far past that is not a
+# plan worth parsing and validating
+_MAX_AI_OUTPUT_CHARS = 64_000
+
+
+def _run_plan_generation(prompt: str) -> List[Dict[str, Any]]:
+    """Call Gemini for one prompt, then parse and validate the plan (blocking)."""
+    full_prompt = (
+        "You are an expert in preventive maintenance planning. "
+        "Always return pure JSON without any markdown formatting.\n\n" + prompt
     )
 
-    prompt = generate_prompt(modified_input)
+    response = _PM_PLAN_MODEL.generate_content(full_prompt)
 
-    try:
-        model = get_gemini_model(
-            temperature=0.4,
-            response_mime_type="application/json",
-            system_instruction="Always return pure JSON, no markdown, no prose outside the JSON."
+    # Output size per plan, to size max_output_tokens from real traffic; a plan cut
+    # off at the cap can't parse, so say so rather than just "invalid JSON"
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        logger.debug(
+            f"📏 AI plan tokens: output={usage.candidates_token_count} prompt={usage.prompt_token_count} "
+            f"cached={getattr(usage, 'cached_content_token_count', 0)}"
         )
+    if response.candidates and response.candidates[0].finish_reason.name == "MAX_TOKENS":
+        logger.warning("⚠️ AI plan output hit max_output_tokens and was truncated")
 
-        full_prompt = (
-            "You are an expert in preventive maintenance planning. "
-            "Always return pure JSON without any markdown formatting.\n\n" + prompt
-        )
+    # response_mime_type="application/json" means no markdown fences to strip
+    ai_output = response.text or ""
+    if len(ai_output) > _MAX_AI_OUTPUT_CHARS:
+        logger.error(f"AI output too large to parse: {len(ai_output)} chars")
+        raise HTTPException(status_code=422, detail="Model response was too large.")
+
+    # Parse & validate
+    try:
+        plan_json = orjson.loads(ai_output)
+    except orjson.JSONDecodeError:
+        logger.error("AI output was not valid JSON")
+        logger.error(f"Raw content (first 600 chars): {ai_output[:600]}...")
+        raise HTTPException(status_code=422, detail="Model did not return valid JSON.")
+    _validate_plan_structure(plan_json)
+
+    return plan_json.get("maintenance_plan", [])
 
-        response = model.generate_content(full_prompt)
-        ai_output = (response.text or "").replace("```json", "").replace("```", "").strip()
 
-        # Parse & validate
-        try:
-            plan_json = json.loads(ai_output)
-        except json.JSONDecodeError:
-            logger.error("AI output was not valid JSON")
-            logger.error(f"Raw content (first 600 chars): {ai_output[:600]}...")
-            raise HTTPException(status_code=422, detail="Model did not return valid JSON.")
-        _validate_plan_structure(plan_json)
+async def _generate_plan_tasks(prompt: str) -> List[Dict[str, Any]]:
+    """
+    Generate the maintenance tasks for a prompt off the event loop. Served from
+    the plan cache when the same prompt was answered recently, and shared with
+    any identical request already in flight.
+    """
+    key = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+    cached = _plan_cache.get(key)
+    if cached is not None:
+        logger.info("♻️ Serving AI plan from cache for identical request")
+        return cached
+
+    task = _inflight_plans.get(key)
+    if task is None:
+        task = asyncio.create_task(asyncio.to_thread(_run_plan_generation, prompt))
+        _inflight_plans[key] = task
+        task.add_done_callback(lambda _: _inflight_plans.pop(key, None))
+    else:
+        logger.info("♻️ Joining in-flight AI plan generation for identical request")
+    # shield: one caller disconnecting must not cancel the others' generation
+    tasks = await asyncio.shield(task)
+    _plan_cache.set(key, tasks)
+    return tasks
+
+
+# ==========
+# Endpoints
+# ==========
+# Largest number of plans one batch request may generate
+_MAX_BATCH_SIZE = 20
+
+
+class PMPlanBatchInput(BaseModel):
+    inputs: List[PMPlanInput]
+
+
+async def _resolve_runtime_hours(inputs: List[PMPlanInput]) -> Dict[str, str]:
+    """Runtime hours (by child id) for every input that names its parent and child asset."""
+    pairs = [(i.parent_asset_id, i.child_asset_id) for i in inputs if i.parent_asset_id and i.child_asset_id]
+    if not pairs:
+        return {}
+    # Sync Supabase client - run the lookup in a worker thread, not on the event loop
+    return await asyncio.to_thread(_fetch_runtime_hours, pairs)
+
+
+def _plan_prompt(input: PMPlanInput, runtime_hours: Dict[str, str]) -> str:
+    # Use the calculated hours when available, otherwise the submitted value
+    calculated_hours = runtime_hours.get(input.child_asset_id, input.hours)
+    return generate_prompt(input.model_copy(update={"hours": calculated_hours}))
+
+
+@router.post("/api/generate-ai-plan")
+async def generate_ai_plan(input: PMPlanInput, request: Request):
+    logger.info(f"🚀 Received AI plan request: {input.name}")
+
+    prompt = _plan_prompt(input, await _resolve_runtime_hours([input]))
+
+    try:
+        maintenance_tasks = await _generate_plan_tasks(prompt)
 
         logger.info("✅ AI plan generated and validated successfully")
         # Return in the format expected by the frontend (AIPlanResponse)
-        maintenance_tasks = plan_json.get("maintenance_plan", [])
         return {"success": True, "data": maintenance_tasks}
 
+    except HTTPException:
+        # 422s for oversized, unparseable or invalid model output
+        raise
     except Exception as e:
         logger.error(f"🧠 Gemini error: {e}")
         raise HTTPException(status_code=500, detail="Gemini API error.")
+
+
+@router.post("/api/generate-ai-plan-batch")
+async def generate_ai_plan_batch(
+    batch: PMPlanBatchInput,
+    request: Request,
+    user: AuthenticatedUser = Depends(verify_supabase_token)
+):
+    """
+    Generate plans for several child assets in one request. Runtime hours for all
+    of them come from a single database query and the Gemini calls run
+    concurrently. Results are returned in input order; one failed plan doesn't
+    fail the others. Requires authentication.
+    """
+    if not batch.inputs:
+        raise HTTPException(status_code=422, detail="'inputs' must not be empty.")
+    if len(batch.inputs) > _MAX_BATCH_SIZE:
+        raise HTTPException(status_code=422, detail=f"At most {_MAX_BATCH_SIZE} plans per batch.")
+
+    logger.info(f"🚀 User {user.email} requested AI plan batch: {len(batch.inputs)} plans")
+
+    runtime_hours = await _resolve_runtime_hours(batch.inputs)
+    prompts = [_plan_prompt(input, runtime_hours) for input in batch.inputs]
+    outcomes = await asyncio.gather(
+        *(_generate_plan_tasks(prompt) for prompt in prompts), return_exceptions=True
+    )
+
+    results = []
+    for input, outcome in zip(batch.inputs, outcomes):
+        if isinstance(outcome, HTTPException):
+            logger.error(f"🧠 Invalid AI plan for {input.name}: {outcome.detail}")
+            results.append({"success": False, "error": outcome.detail})
+        elif isinstance(outcome, Exception):
+            logger.error(f"🧠 Gemini error for {input.name}: {outcome}")
+            results.append({"success": False, "error": "Gemini API error."})
+        else:
+            results.append({"success": True, "data": outcome})
+
+    logger.info(f"✅ AI plan batch completed: {sum(r['success'] for r in results)}/{len(results)} succeeded")
+    return {"success": True, "results": results}
@@ -5,45 +5,21 @@ Sends notification to support when a user generates a PM plan
 
 from fastapi import APIRouter
 from pydantic import BaseModel
-import resend
-import os
-from typing import Optional
+import asyncio
+from html import escape
+from typing import Optional, List
+
+from ._resend_api import RESEND_API_KEY, post_email, send_batch_with_retry
 
 router = APIRouter()
 
-# Initialize Resend with API key - reuse existing pattern
-if os.getenv("RESEND_API_KEY"):
-    resend.api_key = os.getenv("RESEND_API_KEY")
+if RESEND_API_KEY:
     print("✅ Resend configured for PM plan notifications")
 else:
     print("⚠️ RESEND_API_KEY not set - PM plan notifications will be simulated")
 
-class PMPlanNotificationRequest(BaseModel):
-    user_name: str
-    user_email: str
-    company_name: str
-    asset_name: Optional[str] = None
-    asset_type: Optional[str] = None
-
-async def send_pm_plan_notification_email(request: PMPlanNotificationRequest):
-    """
-    Send notification email to support when a user generates a PM plan
-    This is a utility function that can be called from other endpoints
-    """
-    try:
-        # Check if RESEND_API_KEY is configured
-        if not os.getenv("RESEND_API_KEY"):
-            print("Warning: RESEND_API_KEY not configured, simulating PM plan notification")
-            print(f"Simulated notification: {request.user_name} ({request.user_email}) from {request.company_name}")
-            return {
-                "success": True,
-                "message": "Email notification simulated (not configured)"
-            }
-
-        # Prepare the email content
-        subject = f"PM Plan Generated - {request.company_name}"
-
-        html_content = f"""
+# Static markup built once at import; only the request fields are formatted in per send
+_NOTIFICATION_HTML = """
         <!DOCTYPE html>
         <html>
         <head>
@@ -65,37 +41,156 @@ async def send_pm_plan_notification_email(request: PMPlanNotificationRequest):
                     <p>A user has generated a new PM plan. Details below:</p>
 
                     <div class="info-row">
-                        <span class="label">User Name:</span> {request.user_name}
+                        <span class="label">User Name:</span> {user_name}
                     </div>
 
                     <div class="info-row">
-                        <span class="label">User Email:</span> {request.user_email}
+                        <span class="label">User Email:</span> {user_email}
                     </div>
 
                     <div class="info-row">
-                        <span class="label">Company:</span> {request.company_name}
+                        <span class="label">Company:</span> {company_name}
                     </div>
 
-                    {f'''<div class="info-row">
-                        <span class="label">Asset Name:</span> {request.asset_name}
-                    </div>''' if request.asset_name else ''}
+                    {asset_name_row}
 
-                    {f'''<div class="info-row">
-                        <span class="label">Asset Type:</span> {request.asset_type}
-                    </div>''' if request.asset_type else ''}
+                    {asset_type_row}
                 </div>
             </div>
         </body>
         </html>
         """
 
-        # Send email using Resend
-        response = resend.Emails.send({
+_OPTIONAL_ROW_HTML = """<div class="info-row">
+                        <span class="label">{label}:</span> {value}
+                    </div>"""
+
+# Notifications are queued and sent in batches via Resend's batch endpoint. The dispatcher
+# waits up to _BATCH_WAIT_SECONDS after the first queued email for more to arrive,
+# then sends everything collected (at most _BATCH_MAX_SIZE, Resend's batch limit).
+# The queue is bounded since the endpoint feeding it is unauthenticated.
+_BATCH_MAX_SIZE = 100
+_BATCH_WAIT_SECONDS = 0.5
+_QUEUE_MAX_SIZE = 1000
+_STOP = object()  # queued on shutdown; the dispatcher sends what it holds and exits
+_queue: Optional[asyncio.Queue] = None
+_dispatcher: Optional[asyncio.Task] = None
+
+
+async def _send_batch(batch: List[dict]):
+    try:
+        response = await send_batch_with_retry(batch)
+        print(f"PM plan notification batch sent ({len(batch)} emails): {response}")
+    except Exception as e:
+        print(f"Error sending PM plan notification batch ({len(batch)} emails): {str(e)}")
+
+
+async def _dispatch_notifications():
+    loop = asyncio.get_running_loop()
+    stopping = False
+    while not stopping:
+        item = await _queue.get()
+        if item is _STOP:
+            break
+        batch = [item]
+        deadline = loop.time() + _BATCH_WAIT_SECONDS
+        while len(batch) < _BATCH_MAX_SIZE:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(_queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if item is _STOP:
+                stopping = True
+                break
+            batch.append(item)
+        await _send_batch(batch)
+
+
+async def start_notification_dispatcher():
+    """Start the background batch sender; called on application startup."""
+    global _queue, _dispatcher
+    if _dispatcher is None:
+        _queue = asyncio.Queue(maxsize=_QUEUE_MAX_SIZE)
+        _dispatcher = asyncio.create_task(_dispatch_notifications())
+
+
+async def stop_notification_dispatcher():
+    """Stop the batch sender and flush anything still queued; called on shutdown."""
+    global _queue, _dispatcher
+    if _dispatcher is None:
+        return
+    # The sentinel lands behind everything already queued, so the dispatcher
+    # sends its current batch and the backlog before it exits
+    await _queue.put(_STOP)
+    await _dispatcher
+    queue, _queue, _dispatcher = _queue, None, None
+    # Anything queued after the sentinel
+    pending = []
+    while not queue.empty():
+        pending.append(queue.get_nowait())
+    for i in range(0, len(pending), _BATCH_MAX_SIZE):
+        await _send_batch(pending[i:i + _BATCH_MAX_SIZE])
+
+
+class PMPlanNotificationRequest(BaseModel):
+    user_name: str
+    user_email: str
+    company_name: str
+    asset_name: Optional[str] = None
+    asset_type: Optional[str] = None
+
+async def send_pm_plan_notification_email(request: PMPlanNotificationRequest):
+    """
+    Send notification email to support when a user generates a PM plan
+    This is a utility function that can be called from other endpoints
+    """
+    try:
+        # Check if RESEND_API_KEY is configured
+        if not RESEND_API_KEY:
+            print("Warning: RESEND_API_KEY not configured, simulating PM plan notification")
+            print(f"Simulated notification: {request.user_name} ({request.user_email}) from {request.company_name}")
+            return {
+                "success": True,
+                "message": "Email notification simulated (not configured)"
+            }
+
+        # Prepare the email content
+        subject = f"PM Plan Generated - {request.company_name}"
+
+        html_content = _NOTIFICATION_HTML.format(
+            user_name=escape(request.user_name),
+            user_email=escape(request.user_email),
+            company_name=escape(request.company_name),
+            asset_name_row=_OPTIONAL_ROW_HTML.format(label="Asset Name", value=escape(request.asset_name)) if request.asset_name else '',
+            asset_type_row=_OPTIONAL_ROW_HTML.format(label="Asset Type", value=escape(request.asset_type)) if request.asset_type else '',
+        )
+
+        params = {
             "from": "ArcTecFox PM Planner <notifications@arctecfox.ai>",
             "to": ["support@arctecfox.co"],
             "subject": subject,
             "html": html_content
-        })
+        }
+
+        # Queue for the batch dispatcher; send directly if it isn't running
+        if _queue is not None:
+            try:
+                _queue.put_nowait(params)
+            except asyncio.QueueFull:
+                print(f"PM plan notification queue full, dropping notification for {request.user_email}")
+                return {
+                    "success": False,
+                    "message": "Notification queue full"
+                }
+            return {
+                "success": True,
+                "message": "Notification queued"
+            }
+
+        response = await post_email(params)
 
         print(f"PM plan notification email sent successfully: {response}")
 
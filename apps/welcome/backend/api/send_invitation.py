@@ -6,19 +6,40 @@ from datetime import datetime, timedelta
 from fastapi import HTTPException
 from pydantic import BaseModel
 from typing import Optional
-import resend
 from supabase import create_client, Client
 from .email_templates import create_invitation_email_content
+from ._resend_api import RESEND_API_KEY, post_email
 
 # Initialize Resend 
 # IMPORTANT: Set RESEND_API_KEY environment variable in production
 # For development/testing, emails will be simulated if API key is not set
-if os.getenv("RESEND_API_KEY"):
-    resend.api_key = os.getenv("RESEND_API_KEY")
+if RESEND_API_KEY:
     print("✅ Resend configured - emails will be sent")
 else:
     print("⚠️ RESEND_API_KEY not set - emails will be simulated (logged only)")
 
+_supabase_client: Optional[Client] = None
+
+
+def _get_supabase_client() -> Client:
+    """
+    Return the process-wide service-role Supabase client, creating it on first use.
+    Reusing one client keeps its underlying HTTP connection pool warm across invitations.
+    """
+    global _supabase_client
+    if _supabase_client is None:
+        # SUPABASE_KEY is the service role key in production (bypasses RLS)
+        supabase_url = os.getenv("SUPABASE_URL")
+        supabase_key = os.getenv("SUPABASE_KEY")  # This IS the service role key
+
+        if not supabase_url or not supabase_key:
+            raise HTTPException(status_code=500, detail="Missing Supabase service credentials (SUPABASE_KEY)")
+
+        _supabase_client = create_client(supabase_url, supabase_key)
+        print(f"✅ Using service role key for invitation operations")
+    return _supabase_client
+
+
 class InvitationRequest(BaseModel):
     email: str
     full_name: Optional[str] = None
@@ -28,16 +49,8 @@ class InvitationRequest(BaseModel):
 async def send_invitation_email(request: InvitationRequest, invited_by_user_id: str = None):
     """Send invitation email to user using Supabase native email (interim) or Resend (when configured)"""
     try:
-        # Initialize Supabase client using same pattern as task_due_dates.py
-        # SUPABASE_KEY is the service role key in production (bypasses RLS)
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_KEY")  # This IS the service role key
-        
-        if not supabase_url or not supabase_key:
-            raise HTTPException(status_code=500, detail="Missing Supabase service credentials (SUPABASE_KEY)")
-        
-        supabase: Client = create_client(supabase_url, supabase_key)
-        print(f"✅ Using service role key for invitation operations")
+        # Reuse the cached Supabase client with service role key (bypasses RLS)
+        supabase: Client = _get_supabase_client()
         
         # Get site and company details
         site_response = supabase.table("sites").select("*, companies(*)").eq("id", request.site_id).single().execute()
@@ -97,7 +110,7 @@ async def send_invitation_email(request: InvitationRequest, invited_by_user_id:
             print(f"✅ Invitation record created (no data returned due to RLS)")
         
         # Determine email method based on configuration
-        use_supabase_email = not os.getenv("RESEND_API_KEY")  # Use Supabase if Resend not configured
+        use_supabase_email = not RESEND_API_KEY  # Use Supabase if Resend not configured
         
         if use_supabase_email:
             # INTERIM SOLUTION: Use Supabase native email invitations
@@ -149,9 +162,9 @@ async def send_invitation_email(request: InvitationRequest, invited_by_user_id:
             )
             
             # Send email if Resend API key is configured, otherwise simulate
-            if os.getenv("RESEND_API_KEY"):
+            if RESEND_API_KEY:
                 try:
-                    response = resend.Emails.send({
+                    response = await post_email({
                         "from": os.getenv("RESEND_FROM_EMAIL", "user_admin@arctecfox.ai"),
                         "to": request.email,
                         "subject": subject,
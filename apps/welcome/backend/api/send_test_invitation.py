@@ -5,12 +5,11 @@ import os
 from fastapi import HTTPException
 from pydantic import BaseModel
 from typing import Optional
-import resend
 from .email_templates import create_invitation_email_content
+from ._resend_api import RESEND_API_KEY, post_email
 
 # Initialize Resend 
-if os.getenv("RESEND_API_KEY"):
-    resend.api_key = os.getenv("RESEND_API_KEY")
+if RESEND_API_KEY:
     print("✅ Resend configured for test emails")
 else:
     print("⚠️ RESEND_API_KEY not set - test emails will be simulated")
@@ -43,7 +42,7 @@ async def send_test_invitation_email(request: TestInvitationRequest):
         print(f"🧪 TEST EMAIL - Content generated successfully. Subject: {subject}")
         
         # Check email configuration
-        resend_api_key = os.getenv("RESEND_API_KEY")
+        resend_api_key = RESEND_API_KEY
         print(f"🧪 TEST EMAIL - RESEND_API_KEY configured: {'Yes' if resend_api_key else 'No'}")
         
         # Send email if API key is configured, otherwise simulate
@@ -73,7 +72,7 @@ async def send_test_invitation_email(request: TestInvitationRequest):
             print(f"  Text length: {len(email_data['text'])}")
             
             try:
-                response = resend.Emails.send(email_data)
+                response = await post_email(email_data)
                 print(f"✅ TEST email sent successfully with {test_from}")
                 print(f"📧 Resend ID: {response.get('id', 'N/A')}")
                 print(f"📧 Resend response: {response}")
@@ -86,7 +85,7 @@ async def send_test_invitation_email(request: TestInvitationRequest):
                     custom_email_data["subject"] = f"[CUSTOM] {subject}"
                     
                     try:
-                        custom_response = resend.Emails.send(custom_email_data)
+                        custom_response = await post_email(custom_email_data)
                         print(f"✅ Custom domain email also sent successfully!")
                         print(f"📧 Custom Resend ID: {custom_response.get('id', 'N/A')}")
                     except Exception as custom_e:
@@ -97,13 +96,11 @@ async def send_test_invitation_email(request: TestInvitationRequest):
                 print(f"❌ Failed to send TEST email via Resend: {str(e)}")
                 print(f"📧 Error type: {type(e).__name__}")
                 
-                # Try to get more details from the Resend error
-                if hasattr(e, 'code'):
-                    print(f"📧 Resend error code: {e.code}")
-                if hasattr(e, 'message'):
-                    print(f"📧 Resend error message: {e.message}")
-                if hasattr(e, 'error_type'):
-                    print(f"📧 Resend error type: {e.error_type}")
+                # Try to get more details from the Resend error response
+                error_response = getattr(e, 'response', None)
+                if error_response is not None:
+                    print(f"📧 Resend status code: {error_response.status_code}")
+                    print(f"📧 Resend error body: {error_response.text}")
                     
                 import traceback
                 print(f"📧 Full traceback: {traceback.format_exc()}")
@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException, Request, Depends
 from pydantic import BaseModel, Field
 from typing import Optional
 import logging
-import json
+import orjson
 import os
 import sys
 # Add parent directory to path to import auth module
@@ -20,6 +20,9 @@ except ImportError:
 router = APIRouter()
 logger = logging.getLogger("main")
 
+# Centralized AI configuration, built once and shared across requests
+_SUGGEST_MODEL = get_gemini_model(temperature=0.7, max_output_tokens=4096, response_mime_type="application/json")
+
 # Rate limiter (optional)
 if RATE_LIMITING_AVAILABLE:
     limiter = Limiter(key_func=get_remote_address)
@@ -108,10 +111,8 @@ Suggest up to {input_data.top_n} child assets that are most relevant for prevent
 """
 
     try:
-        # Use centralized AI configuration
-        model = get_gemini_model(temperature=0.7, max_output_tokens=4096)
         full_prompt = "You are an expert in asset management and preventive maintenance planning. Always return pure JSON without any markdown formatting.\n\n" + prompt
-        response = model.generate_content(full_prompt)
+        response = _SUGGEST_MODEL.generate_content(full_prompt)
     except Exception as ge:
         logger.error(f"🧠 Gemini API error: {ge}")
         raise HTTPException(status_code=502, detail="Gemini API error")
@@ -119,14 +120,14 @@ Suggest up to {input_data.top_n} child assets that are most relevant for prevent
     raw_content = response.text
     logger.info("🧠 AI response received from Gemini for child asset suggestions")
 
-    # Clean the response (same pattern as PM generation)
-    raw_content = raw_content.replace("```json", "").replace("```", "").strip()
+    # JSON mime type: the model returns bare JSON, no code fences to clean up
+    raw_content = (raw_content or "").strip()
 
     try:
-        suggestions_data = json.loads(raw_content)
+        suggestions_data = orjson.loads(raw_content)
         logger.info("✅ Child asset suggestions generated successfully")
         return {"success": True, "suggestions": suggestions_data}
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         logger.error(f"❌ JSON decode error: {e}")
         logger.error(f"Raw content: {raw_content[:200]}...")
         raise HTTPException(status_code=500, detail="AI returned invalid JSON format")
@@ -9,6 +9,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from supabase import create_client
 import httpx
 from dotenv import load_dotenv
+from http_client import get_http_client
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -50,41 +51,41 @@ async def verify_supabase_token(
             detail="Authentication service not configured"
         )
     
-    # Verify token with Supabase Auth API
+    # Verify token with Supabase Auth API (pooled client keeps the connection warm)
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{supabase_url}/auth/v1/user",
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "apikey": os.getenv("SUPABASE_ANON_KEY")
-                }
+        client = get_http_client()
+        response = await client.get(
+            f"{supabase_url}/auth/v1/user",
+            headers={
+                "Authorization": f"Bearer {token}",
+                "apikey": os.getenv("SUPABASE_ANON_KEY")
+            }
+        )
+        
+        if response.status_code == 200:
+            user_data = response.json()
+            logger.info(f"✅ Authenticated user: {user_data.get('email')}")
+            return AuthenticatedUser(user_data, token)
+        elif response.status_code == 401:
+            logger.warning(f"❌ Invalid or expired token")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired token",
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+        elif response.status_code == 403:
+            logger.error(f"❌ Forbidden: Check SUPABASE_ANON_KEY permissions. Response: {response.text}")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired token",
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+        else:
+            logger.error(f"❌ Unexpected auth response: {response.status_code}, Body: {response.text}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Authentication service error"
             )
-            
-            if response.status_code == 200:
-                user_data = response.json()
-                logger.info(f"✅ Authenticated user: {user_data.get('email')}")
-                return AuthenticatedUser(user_data, token)
-            elif response.status_code == 401:
-                logger.warning(f"❌ Invalid or expired token")
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid or expired token",
-                    headers={"WWW-Authenticate": "Bearer"}
-                )
-            elif response.status_code == 403:
-                logger.error(f"❌ Forbidden: Check SUPABASE_ANON_KEY permissions. Response: {response.text}")
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid or expired token",
-                    headers={"WWW-Authenticate": "Bearer"}
-                )
-            else:
-                logger.error(f"❌ Unexpected auth response: {response.status_code}, Body: {response.text}")
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Authentication service error"
-                )
     except httpx.RequestError as e:
         logger.error(f"❌ Auth service connection error: {e}")
         raise HTTPException(
@@ -1,4 +1,5 @@
 import os
+import functools
 from pydantic_settings import BaseSettings
 import google.generativeai as genai
 
@@ -21,6 +22,7 @@ settings = Settings()
 # Configure Gemini API
 genai.configure(api_key=settings.GEMINI_API_KEY)
 
+@functools.lru_cache(maxsize=16)
 def get_gemini_model(
     model_name: str = None,
     temperature: float = None,
@@ -32,6 +34,8 @@ def get_gemini_model(
 ):
     """
     Get a configured Gemini model instance with centralized settings.
+    Cached per argument combination: the model holds no per-request state,
+    so callers with the same settings share one instance.
 
     Args:
         model_name: Override default model name (optional)
@@ -38,9 +38,13 @@ def get_user_supabase_client(token: str):
     logger.info("✅ User-scoped Supabase client initialized")
     return client
 
+_service_client = None
+
+
 def get_service_supabase_client():
     """
-    Create a Supabase client with service key that bypasses RLS.
+    Return the Supabase client with service key that bypasses RLS.
+    Created on first use and shared, so its HTTP connection pool stays warm.
     
     ⚠️ WARNING: Only use for system operations that require admin access:
     - Sending invitation emails (needs to read all sites/companies)
@@ -49,6 +53,10 @@ def get_service_supabase_client():
     
     All usage should be logged for security auditing.
     """
+    global _service_client
+    if _service_client is not None:
+        return _service_client
+
     url = os.getenv("SUPABASE_URL")
     service_key = os.getenv("SUPABASE_SERVICE_KEY")  # Updated to match .env file
     
@@ -57,7 +65,8 @@ def get_service_supabase_client():
         raise ValueError("Missing Supabase service credentials")
     
     logger.warning("⚠️ Service Supabase client initialized - bypasses RLS")
-    return create_client(url, service_key)
+    _service_client = create_client(url, service_key)
+    return _service_client
 
 # Deprecated: Keep for backward compatibility but log usage
 def get_supabase_client():
@@ -0,0 +1,34 @@
+"""
+Shared outbound HTTP client.
+
+One pooled httpx.AsyncClient for the whole process so calls to external
+services (Supabase Auth, etc.) reuse keep-alive connections instead of
+paying a TCP + TLS handshake per request.
+"""
+from typing import Optional
+import httpx
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide AsyncClient, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=50,
+                keepalive_expiry=60,
+            ),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the shared client; called on application shutdown."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -1,5 +1,6 @@
 # apps/welcome/backend/main.py - Production ready with environment-based CORS
 import os
+import asyncio
 import json
 import logging
 import secrets
@@ -11,7 +12,7 @@ from pathlib import Path
 
 import google.generativeai as genai  # Only for debug endpoint
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Request, Depends
+from fastapi import FastAPI, HTTPException, Request, Depends, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, FileResponse
 from pydantic import BaseModel, Field, validator
@@ -25,6 +26,7 @@ from auth import (
     require_admin_role
 )
 from config import get_gemini_model
+from http_client import close_http_client
 from database import get_user_supabase_client as db_get_user_client, get_service_supabase_client
 # Rate limiting imports (optional - graceful fallback if not available)
 try:
@@ -51,7 +53,12 @@ from api.bulk_import import router as bulk_import_router
 from api.full_parent_create_prompt import router as parent_plan_router
 from api.access_requests import router as access_requests_router, send_notification_email
 from api.extract_asset_details import router as extract_details_router
-from api.pm_plan_notification import router as pm_plan_notification_router
+from api.pm_plan_notification import (
+    router as pm_plan_notification_router,
+    start_notification_dispatcher,
+    stop_notification_dispatcher,
+)
+from api._email_assets import b64_file, logo_attachment
 from api.email_confirmations import send_confirmation_email, send_delivery_email, send_plan_generated_notification
 from api.send_invitation import InvitationRequest, send_invitation_email
 from api.send_test_invitation import TestInvitationRequest, send_test_invitation_email
@@ -62,8 +69,8 @@ from api.pm_routes import router as pm_routes_router
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging - LOG_LEVEL=DEBUG enables per-step traces, WARNING quiets production
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
 # Rate limiting setup - user-based rate limiting
@@ -91,6 +98,28 @@ else:
 # Initialize FastAPI app
 app = FastAPI(title="PM Planning AI API", version="1.0.0")
 
+@app.on_event("startup")
+async def start_background_senders():
+    """Start the batched PM plan notification sender"""
+    await start_notification_dispatcher()
+
+@app.on_event("startup")
+async def preload_email_assets():
+    """Load the email logo once at startup so no send pays the first disk read"""
+    # A missing logo is logged here, once, rather than on the first send
+    logo_attachment()
+
+@app.on_event("shutdown")
+async def stop_background_senders():
+    """Flush queued PM plan notifications"""
+    await stop_notification_dispatcher()
+
+@app.on_event("shutdown")
+async def shutdown_http_client():
+    """Release pooled outbound connections"""
+    # Registered after stop_background_senders so the final flush still has the client
+    await close_http_client()
+
 # Add rate limiter to app (only if available)
 if RATE_LIMITING_AVAILABLE and limiter:
     app.state.limiter = limiter
@@ -805,9 +834,81 @@ Return the response as a JSON array with all fields populated.
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _deliver_confirmed_plan(service_client, lead: Dict[str, Any], pm_plan: Dict[str, Any], pdf_path: str):
+    """
+    Background job for a confirmed lead: send the delivery email with the PDF,
+    notify support if an access request is pending, then clean up the PDF.
+    Failures are recorded on the lead since the user has already been redirected.
+    """
+    # Get user name from notes or use email
+    full_name = lead.get("company_name", "there")  # Use company name as fallback
+
+    try:
+        try:
+            # Encode the PDF once; both the delivery email and the support
+            # notification attach it
+            pdf_base64 = await asyncio.to_thread(b64_file, pdf_path)
+
+            logger.info(f"📨 Sending delivery email to {lead['email']}...")
+            await send_delivery_email(
+                email=lead["email"],
+                full_name=full_name,
+                pdf_path=pdf_path,
+                asset_name=pm_plan.get("asset_name"),
+                pdf_base64=pdf_base64
+            )
+
+            # Update lead with delivery email sent timestamp
+            service_client.table("pm_leads")\
+                .update({"delivery_email_sent_at": datetime.now(timezone.utc).isoformat()})\
+                .eq("id", lead["id"])\
+                .execute()
+
+            logger.info(f"✅ Delivery email sent to {lead['email']}")
+
+        except Exception as e:
+            logger.error(f"❌ Failed to send delivery email: {e}")
+            service_client.table("pm_leads")\
+                .update({"failure_reason": f"Delivery email failed: {str(e)}"})\
+                .eq("id", lead["id"])\
+                .execute()
+            return
+
+        # Send access request notification with PDF if applicable
+        try:
+            # Check if there's a pending access request for this lead
+            access_request = service_client.table("access_requests")\
+                .select("*")\
+                .eq("lead_id", lead["id"])\
+                .eq("status", "pending")\
+                .single()\
+                .execute()
+
+            if access_request.data:
+                logger.info(f"📨 Sending access request notification with PDF for {lead['email']}...")
+                await send_notification_email(
+                    email=lead["email"],
+                    full_name=access_request.data.get("full_name", full_name),
+                    company_name=lead.get("company_name"),
+                    pdf_path=pdf_path,
+                    asset_name=pm_plan.get("asset_name"),
+                    pdf_base64=pdf_base64
+                )
+                logger.info(f"✅ Access request notification with PDF sent")
+        except Exception as e:
+            # No access request or failed to send - not critical
+            logger.info(f"ℹ️ No access request notification sent: {e}")
+
+    finally:
+        # Clean up PDF file once every email that attaches it has been sent
+        if os.path.exists(pdf_path):
+            os.remove(pdf_path)
+            logger.info(f"🗑️ Cleaned up PDF: {pdf_path}")
+
+
 # Email confirmation endpoint - public access for confirming free PM plan emails
 @app.get("/api/confirm-email/{token}")
-async def confirm_email(token: str, request: Request):
+async def confirm_email(token: str, request: Request, background_tasks: BackgroundTasks):
     """
     Confirm email address and send PM plan PDF
 
@@ -815,9 +916,9 @@ async def confirm_email(token: str, request: Request):
     1. Validate token (exists, not expired, not already confirmed)
     2. Mark as confirmed
     3. Generate PDF with plan data
-    4. Send delivery email with PDF attachment
-    5. Send support notifications (if applicable)
-    6. Redirect to frontend success page
+    4. Redirect to frontend success page
+    5. In the background: send delivery email with PDF attachment,
+       send support notifications (if applicable), clean up the PDF
     """
     try:
         from fastapi.responses import RedirectResponse
@@ -934,67 +1035,8 @@ async def confirm_email(token: str, request: Request):
             frontend_url = os.getenv("FRONTEND_URL", "https://arctecfox-mono.vercel.app")
             return RedirectResponse(url=f"{frontend_url}/confirm-email?error=pdf_failed")
 
-        # Send delivery email with PDF
-        try:
-            # Get user name from notes or use email
-            full_name = lead.get("company_name", "there")  # Use company name as fallback
-
-            logger.info(f"📨 Sending delivery email to {lead['email']}...")
-            await send_delivery_email(
-                email=lead["email"],
-                full_name=full_name,
-                pdf_path=pdf_path,
-                asset_name=pm_plan.get("asset_name")
-            )
-
-            # Update lead with delivery email sent timestamp
-            service_client.table("pm_leads")\
-                .update({"delivery_email_sent_at": datetime.now(timezone.utc).isoformat()})\
-                .eq("id", lead["id"])\
-                .execute()
-
-            logger.info(f"✅ Delivery email sent to {lead['email']}")
-
-            # Clean up PDF file
-            if os.path.exists(pdf_path):
-                os.remove(pdf_path)
-                logger.info(f"🗑️ Cleaned up PDF: {pdf_path}")
-
-        except Exception as e:
-            logger.error(f"❌ Failed to send delivery email: {e}")
-            service_client.table("pm_leads")\
-                .update({"failure_reason": f"Delivery email failed: {str(e)}"})\
-                .eq("id", lead["id"])\
-                .execute()
-            # Clean up PDF even if email fails
-            if os.path.exists(pdf_path):
-                os.remove(pdf_path)
-            frontend_url = os.getenv("FRONTEND_URL", "https://arctecfox-mono.vercel.app")
-            return RedirectResponse(url=f"{frontend_url}/confirm-email?error=email_failed")
-
-        # Send access request notification with PDF if applicable
-        try:
-            # Check if there's a pending access request for this lead
-            access_request = service_client.table("access_requests")\
-                .select("*")\
-                .eq("lead_id", lead["id"])\
-                .eq("status", "pending")\
-                .single()\
-                .execute()
-
-            if access_request.data:
-                logger.info(f"📨 Sending access request notification with PDF for {lead['email']}...")
-                await send_notification_email(
-                    email=lead["email"],
-                    full_name=access_request.data.get("full_name", full_name),
-                    company_name=lead.get("company_name"),
-                    pdf_path=pdf_path,
-                    asset_name=pm_plan.get("asset_name")
-                )
-                logger.info(f"✅ Access request notification with PDF sent")
-        except Exception as e:
-            # No access request or failed to send - not critical
-            logger.info(f"ℹ️ No access request notification sent: {e}")
+        # Send delivery email and support notification after the redirect is returned
+        background_tasks.add_task(_deliver_confirmed_plan, service_client, lead, pm_plan, pdf_path)
 
         # Redirect to frontend success page
         frontend_url = os.getenv("FRONTEND_URL", "https://arctecfox-mono.vercel.app")
@@ -0,0 +1,51 @@
+-- Authorize the caller, look up the target user by email and promote them to
+-- site admin in a single round trip. Called from api/create_site_admin.py.
+--
+-- Returns {"status": ...} where status is one of:
+--   forbidden      caller is not a site admin
+--   not_found      no users row for p_email (caller creates the auth user)
+--   already_admin  target is already a site admin
+--   promoted       target was promoted to site admin
+-- "id" is included whenever a target user was found.
+--
+-- p_caller may be NULL to skip the authorization check.
+
+CREATE OR REPLACE FUNCTION public.create_or_promote_site_admin(p_caller uuid, p_email text)
+RETURNS jsonb
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_id uuid;
+    v_site_admin boolean;
+BEGIN
+    IF p_caller IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM public.users WHERE id = p_caller AND site_admin
+    ) THEN
+        RETURN jsonb_build_object('status', 'forbidden');
+    END IF;
+
+    -- Lock the row so concurrent requests cannot both promote the same user
+    SELECT id, site_admin INTO v_id, v_site_admin
+    FROM public.users
+    WHERE lower(email) = lower(p_email)
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('status', 'not_found');
+    END IF;
+
+    IF v_site_admin THEN
+        RETURN jsonb_build_object('status', 'already_admin', 'id', v_id);
+    END IF;
+
+    UPDATE public.users SET site_admin = true WHERE id = v_id;
+
+    RETURN jsonb_build_object('status', 'promoted', 'id', v_id);
+END;
+$$;
+
+-- Service role only; the backend performs the call on behalf of the user.
+REVOKE ALL ON FUNCTION public.create_or_promote_site_admin(uuid, text) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.create_or_promote_site_admin(uuid, text) TO service_role;
@@ -0,0 +1,12 @@
+-- Index for the users-by-email lookups in create_or_promote_site_admin and the
+-- invitation endpoints. Emails are compared case-insensitively via lower(email);
+-- INCLUDE (id, site_admin) lets the site-admin lookup be answered from the index
+-- alone. users.id is the primary key and is already indexed.
+--
+-- CONCURRENTLY avoids locking users against writes while the index builds, but
+-- cannot run inside a transaction block - apply this file on its own.
+-- Fails if users contains emails that differ only by case; deduplicate first.
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS users_email_lower_key
+    ON public.users (lower(email))
+    INCLUDE (id, site_admin);
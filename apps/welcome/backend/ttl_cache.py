@@ -0,0 +1,42 @@
+"""
+Small in-process TTL cache.
+
+A dict of {key: (value, expires_at)} with a size cap: expired entries are
+dropped on read, and the oldest entry is evicted when the cache is full.
+Reads and writes take a lock so the cache can be shared with worker threads
+(asyncio.to_thread).
+"""
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Bounded mapping whose entries expire ttl seconds after they are set."""
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: Dict[Hashable, Tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if unknown/expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            # Re-inserting moves the key to the end, so eviction stays oldest-first
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_size:
+                # Drop the oldest entry (dicts keep insertion order)
+                self._entries.pop(next(iter(self._entries)), None)
+            self._entries[key] = (value, time.monotonic() + self.ttl)
@@ -33,8 +33,6 @@ export default function ConfirmEmail() {
         return 'This confirmation link is invalid. Please request a new plan.';
       case 'pdf_failed':
         return 'Your email was confirmed, but we had trouble generating your PM plan PDF. Please contact support.';
-      case 'email_failed':
-        return 'Your email was confirmed, but we had trouble sending your PM plan. Please contact support.';
       case 'server_error':
         return 'An error occurred while processing your confirmation. Please try again or contact support.';
       default: